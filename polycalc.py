@@ -11,6 +11,12 @@ Please enter 'quit', 'exit', Ctrl+C, or Ctrl+D at any time to exit.
 
 FAREWELL = """Thanks for trying me out!"""
 
+OP_LOOKUP = {
+    '+': operator.add,
+    '*': operator.mul,
+    '-': operator.sub
+}
+
 
 def main():
     print(WELCOME)
@@ -39,20 +45,14 @@ def input_poly(prompt):
 
 
 def input_operation(prompt):
-    OP_LOOKUP = {
-        '+': operator.add,
-        '*': operator.mul,
-        '-': operator.sub
-    }
-
     while True:
         op = input_or_quit(prompt)
         if op.upper() == 'D':
             return 'D'
-        try:
-            return OP_LOOKUP[op]
-        except KeyError:
-            print(f"Error: unrecognized operation {op!r}. Please re-enter.")
+        operation = OP_LOOKUP.get(op)
+        if operation is not None:
+            return operation
+        print(f"Error: unrecognized operation {op!r}. Please re-enter.")
 
 
 def input_or_quit(prompt):
@@ -1,15 +1,226 @@
 from __future__ import annotations
+import re
 from enum import Enum, auto
-from typing import List
+from typing import List, Tuple, Union
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+_INT64_MAX = np.iinfo(np.int64).max
+
+# Multiplication is dispatched on the number of coefficient products it needs,
+# len(a) * len(b). From _FFT_THRESHOLD on, an FFT is used whenever it is exact.
+# Otherwise, products of Python-int (object) coefficients use Karatsuba
+# multiplication from _KARATSUBA_THRESHOLD on; for int64 coefficients NumPy's
+# C convolution loop beats Karatsuba implemented with NumPy slicing, so they
+# stay on np.convolve.
+_KARATSUBA_THRESHOLD = 1024
+_FFT_THRESHOLD = 65536
+
+# Operands shorter than this are multiplied directly within `_karatsuba`.
+_KARATSUBA_CUTOFF = 32
+
+# The rounding error of a float64 FFT convolution grows roughly with
+# max|a| * max|b| * n * log2(n); below this bound it stays well under 1/2, so
+# rounding the result recovers the exact integer coefficients.
+_FFT_EXACT_BOUND = 2 ** 49
+
+# `_mul_kernel` is not used by __mul__ yet: on one thread it measured 1.6-1.8x
+# slower than np.convolve from 4096 products up, and its multi-threaded
+# break-even point has not been measured.
+#
+# `_horner_kernel` only wins when there are few points: on one thread it beat
+# the NumPy Horner loop (whose cost is mostly per-coefficient overhead) at up
+# to 256 points, but lost from about 1000 points on once the polynomial has 64
+# or more coefficients (e.g. 2.1 ms vs 1.5 ms at 1000 x 1000). Its first call
+# also pays for JIT compilation (0.1-0.5 s), so it is only used for evaluations
+# of at least 65536 multiplications (e.g. degree 255 at 256 points, ~120 us vs
+# ~290 us), where the saving can repay that over repeated calls.
+_NUMBA_HORNER_THRESHOLD = 65536
+_NUMBA_HORNER_MAX_POINTS = 256
+
+
+def _as_coeff_array(coeffs) -> np.ndarray:
+    """Return `coeffs` as an int64 array, or as an object array of Python ints
+    if any coefficient is too large to fit in 64 bits. Non-integer coefficients
+    raise TypeError instead of being truncated.
+    """
+    arr = np.asarray(coeffs)
+    if arr.size == 0:
+        return np.zeros(arr.shape, dtype=np.int64)
+    kind = arr.dtype.kind
+    if kind == 'f' and not isinstance(coeffs, np.ndarray):
+        # NumPy infers float64 for lists mixing ints in [2**63, 2**64) with
+        # other ints; look at the original Python objects instead.
+        arr = np.asarray(coeffs, dtype=object)
+        kind = 'O'
+    if kind == 'O':
+        for c in arr.flat:
+            if not isinstance(c, (int, np.integer)):
+                raise TypeError(
+                    f"Polynomial coefficients must be integers, not {type(c).__name__}")
+        try:
+            return np.array(arr, dtype=np.int64)
+        except OverflowError:
+            return np.array([int(c) for c in arr.flat], dtype=object).reshape(arr.shape)
+    if kind == 'u' and arr.max() > _INT64_MAX:
+        return arr.astype(object)
+    if kind not in 'biu':
+        raise TypeError(f"Polynomial coefficients must be integers, not {arr.dtype}")
+    return np.array(arr, dtype=np.int64)
+
+
+def _max_abs(a: np.ndarray) -> int:
+    if a.size == 0:
+        return 0
+    return max(-int(a.min()), int(a.max()))
+
+
+def _product_bound(a: np.ndarray, b: np.ndarray) -> int:
+    """Return an upper bound on the magnitude of any coefficient of the product
+    of the polynomials with coefficient arrays `a` and `b`.
+    """
+    return _max_abs(a) * _max_abs(b) * min(a.size, b.size)
+
+
+def _horner_may_overflow(coeffs: np.ndarray, x) -> bool:
+    """Return whether evaluating `coeffs` at the integer point(s) `x` with
+    int64 arithmetic could overflow. Floating-point `x` never does.
+    """
+    x = np.asarray(x)
+    if x.dtype.kind not in 'biuO':
+        return False
+    n = coeffs.shape[-1]
+    return _max_abs(coeffs) * n * max(_max_abs(x), 1) ** max(n - 1, 0) > _INT64_MAX
+
+
+def _trim(a: np.ndarray) -> np.ndarray:
+    """Strip trailing zero coefficients from `a`, keeping at least one. For a
+    batch of polynomials, only columns that are zero in every row are stripped.
+    """
+    nz = np.flatnonzero(a.any(axis=tuple(range(a.ndim - 1))))
+    return a[..., :nz[-1] + 1] if nz.size else a[..., :1]
+
+
+def _zeros_for_sum(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Return a zeroed array large enough to hold `a` plus or minus `b`, using
+    object dtype if the result could overflow int64.
+    """
+    if _max_abs(a) + _max_abs(b) > _INT64_MAX:
+        dtype = object
+    else:
+        dtype = np.result_type(a, b)
+    shape = np.broadcast_shapes(a.shape[:-1], b.shape[:-1]) + (max(a.shape[-1], b.shape[-1]),)
+    return np.zeros(shape, dtype=dtype)
+
+
+def _fft_is_exact(a: np.ndarray, b: np.ndarray) -> bool:
+    n = a.size + b.size - 1
+    return _max_abs(a) * _max_abs(b) * n * n.bit_length() < _FFT_EXACT_BOUND
+
+
+def _karatsuba(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Convolve the object (Python int) arrays `a` and `b` with Karatsuba's
+    algorithm.
+    """
+    if a.size < _KARATSUBA_CUTOFF or b.size < _KARATSUBA_CUTOFF:
+        return np.convolve(a, b)
+    m = min(a.size, b.size) // 2
+    a0, a1 = a[:m], a[m:]
+    b0, b1 = b[:m], b[m:]
+    # The high halves are at least as long as the low ones.
+    a01 = a1.copy()
+    a01[:m] += a0
+    b01 = b1.copy()
+    b01[:m] += b0
+
+    z0 = _karatsuba(a0, b0)
+    z2 = _karatsuba(a1, b1)
+    z1 = _karatsuba(a01, b01)
+    z1 -= z2
+    z1[:z0.size] -= z0
+
+    out = np.zeros(a.size + b.size - 1, dtype=np.result_type(a, b))
+    out[:z0.size] += z0
+    out[m:m + z1.size] += z1
+    out[2 * m:] += z2
+    return out
+
+
+def _fft_convolve(p: Polynomial, q: Polynomial) -> np.ndarray:
+    """Convolve the coefficients of `p` and `q` using real FFTs. The caller is
+    responsible for checking that the result is exactly representable (see
+    `_fft_is_exact`).
+    """
+    out_len = p.coeffs.size + q.coeffs.size - 1
+    n = 1 << (out_len - 1).bit_length()
+    c = np.fft.irfft(p._rfft(n) * q._rfft(n), n)[:out_len]
+    return np.rint(c).astype(np.int64)
+
+
+if numba is not None:
+    @numba.njit(cache=True, parallel=True)
+    def _mul_kernel(a, b, out):
+        """Direct convolution of int64 arrays `a` and `b` into `out`. Each output
+        coefficient is an independent reduction, so they are computed in parallel.
+        """
+        for k in numba.prange(out.size):
+            acc = 0
+            for i in range(max(0, k - b.size + 1), min(k, a.size - 1) + 1):
+                acc += a[i] * b[k - i]
+            out[k] = acc
+
+    @numba.njit(cache=True, parallel=True)
+    def _horner_kernel(coeffs, xs, out):
+        """Evaluate the polynomial with coefficients `coeffs` at every point of the
+        float64 array `xs` using Horner's scheme, writing the results to `out`.
+        """
+        for k in numba.prange(xs.size):
+            x = xs[k]
+            acc = 0.0
+            for i in range(coeffs.size - 1, -1, -1):
+                acc = acc * x + coeffs[i]
+            out[k] = acc
+else:
+    _mul_kernel = None
+    _horner_kernel = None
 
 
 class Polynomial:
+    """A polynomial with integer coefficients, stored in order of ascending powers.
+
+    `coeffs` may also be two-dimensional, in which case each row holds the
+    coefficients of one polynomial of a batch (see `Polynomial.stack`).
+    Batches can be evaluated, differentiated, added and subtracted as a unit.
+
+    Coefficients must be integers; anything else is rejected rather than truncated.
+    >>> Polynomial([1, 2**63])
+    Polynomial(1 + 9223372036854775808x)
+    >>> Polynomial([1.5, 2.7])
+    Traceback (most recent call last):
+        ...
+    TypeError: Polynomial coefficients must be integers, not float
+    """
 
-    coeffs: List[int]
+    coeffs: np.ndarray
     disp_ch: str = 'x'
 
     def __init__(self, coeffs, *, disp_ch=None):
-        self.coeffs = coeffs
+        self.coeffs = _as_coeff_array(coeffs)
+        if self.coeffs.ndim not in (1, 2):
+            raise ValueError(
+                f"Polynomial coefficients must be one- or two-dimensional, "
+                f"not {self.coeffs.ndim}-dimensional")
+        # The coefficients are immutable, so __str__ can cache its result; the
+        # cache is keyed on disp_ch, which may still be reassigned.
+        self.coeffs.flags.writeable = False
+        self._str_cache = None
+        self._rfft_cache = {}
         if disp_ch:
             self.disp_ch = disp_ch
 
@@ -24,13 +235,32 @@ class Polynomial:
         >>> q = Polynomial([14, 12, 9, 11], disp_ch='z')
         >>> str(q)
         '14 + 12z + 9z^2 + 11z^3'
+        >>> str(Polynomial([-1, 0, -1]))
+        '-1 - x^2'
+        >>> q.disp_ch = 'y'
+        >>> str(q)
+        '14 + 12y + 9y^2 + 11y^3'
         """
+        if self._str_cache is not None and self._str_cache[0] == self.disp_ch:
+            return self._str_cache[1]
+
+        if self.coeffs.ndim == 2:
+            rows = (str(Polynomial(row, disp_ch=self.disp_ch)) for row in self.coeffs)
+            ret = f"[{', '.join(rows)}]"
+            self._str_cache = (self.disp_ch, ret)
+            return ret
+
         retlist = []
 
-        for (pow, coeff) in enumerate(self.coeffs):
+        for (pow, coeff) in enumerate(self.coeffs.tolist()):
             if coeff == 0:
                 continue
-            if coeff == 1:
+            if retlist:
+                retlist.append(" - " if coeff < 0 else " + ")
+            elif coeff < 0:
+                retlist.append("-")
+            coeff = abs(coeff)
+            if coeff == 1 and pow != 0:
                 coeff_part = ""
             else:
                 coeff_part = str(coeff)
@@ -43,12 +273,52 @@ class Polynomial:
 
             retlist.append(f'{coeff_part}{pow_part}')
 
-        ret = " + ".join(retlist).replace("+ -", "- ")
+        ret = "".join(retlist) or "0"
+        self._str_cache = (self.disp_ch, ret)
         return ret
 
     def __repr__(self) -> str:
         return f'{type(self).__name__}({str(self)})'
 
+    def __call__(self, x):
+        """
+        Evaluate the polynomial at `x` using Horner's scheme. `x` may also be a
+        NumPy array, in which case the polynomial is evaluated elementwise.
+        >>> p = Polynomial([3, 4, 5, 9])
+        >>> p(2)
+        103
+        >>> p(np.array([0.0, 0.5, -1.0]))
+        array([ 3.   ,  7.375, -5.   ])
+
+        A batch evaluates all of its polynomials in the same pass, with one
+        row of results per polynomial, matching each row evaluated alone:
+        >>> batch = Polynomial.stack([p, p.derivative()])
+        >>> batch(2**30).tolist() == [p(2**30), p.derivative()(2**30)]
+        True
+        """
+        coeffs = self.coeffs
+        if coeffs.ndim == 2:
+            if coeffs.dtype != object and _horner_may_overflow(coeffs, x):
+                coeffs = coeffs.astype(object)
+            columns = coeffs.reshape(coeffs.shape + (1,) * np.ndim(x))
+            acc = 0
+            for i in range(coeffs.shape[1] - 1, -1, -1):
+                acc = acc * x + columns[:, i]
+            return acc
+
+        if (_horner_kernel is not None and isinstance(x, np.ndarray)
+                and x.dtype == np.float64 and coeffs.dtype != object
+                and x.size <= _NUMBA_HORNER_MAX_POINTS
+                and x.size * coeffs.size >= _NUMBA_HORNER_THRESHOLD):
+            out = np.empty(x.shape)
+            _horner_kernel(coeffs, np.ascontiguousarray(x).ravel(), out.reshape(-1))
+            return out
+
+        acc = 0
+        for coeff in reversed(coeffs.tolist()):
+            acc = acc * x + coeff
+        return acc
+
     def __add__(self, other: Polynomial) -> Polynomial:
         """
         Return the result of polynomial addition with `other`.
@@ -56,16 +326,13 @@ class Polynomial:
         >>> q = Polynomial([9, 12, 3])
         >>> p + q
         Polynomial(12 + 16x + 8x^2 + 9x^3)
+        >>> Polynomial([]) + Polynomial([1])
+        Polynomial(1)
         """
-        new_coeffs = [0] * max(len(self.coeffs), len(other.coeffs))
-
-        for (pow, coeff) in enumerate(self.coeffs):
-            new_coeffs[pow] += coeff
-
-        for (pow, coeff) in enumerate(other.coeffs):
-            new_coeffs[pow] += coeff
-
-        return Polynomial(new_coeffs)
+        out = _zeros_for_sum(self.coeffs, other.coeffs)
+        out[..., :self.coeffs.shape[-1]] = self.coeffs
+        out[..., :other.coeffs.shape[-1]] += other.coeffs
+        return Polynomial(_trim(out))
 
     def __sub__(self, other: Polynomial) -> Polynomial:
         """
@@ -75,15 +342,10 @@ class Polynomial:
         >>> p - q
         Polynomial(-6 - 8x + 2x^2 + 9x^3)
         """
-        new_coeffs = [0] * max(len(self.coeffs), len(other.coeffs))
-
-        for (pow, coeff) in enumerate(self.coeffs):
-            new_coeffs[pow] += coeff
-
-        for (pow, coeff) in enumerate(other.coeffs):
-            new_coeffs[pow] -= coeff
-
-        return Polynomial(new_coeffs)
+        out = _zeros_for_sum(self.coeffs, other.coeffs)
+        out[..., :self.coeffs.shape[-1]] = self.coeffs
+        out[..., :other.coeffs.shape[-1]] -= other.coeffs
+        return Polynomial(_trim(out))
 
     def __mul__(self, other: Polynomial) -> Polynomial:
         """
@@ -92,14 +354,94 @@ class Polynomial:
         >>> q = Polynomial([9, 12, 3])
         >>> p * q
         Polynomial(27 + 72x + 102x^2 + 153x^3 + 123x^4 + 27x^5)
+        >>> p * Polynomial([])
+        Polynomial(0)
+
+        Large products go through Karatsuba (for Python-int coefficients) or
+        an FFT, and must agree exactly with a direct convolution:
+        >>> rng = np.random.default_rng(0)
+        >>> def check(a, b):
+        ...     expected = np.convolve(a.astype(object), b.astype(object))
+        ...     return (Polynomial(a) * Polynomial(b)).coeffs.tolist() == expected.tolist()
+        >>> huge = lambda n: rng.integers(1, 1000, n).astype(object) * 2**70
+        >>> check(huge(40), huge(40)), check(huge(40), huge(100)), check(huge(130), huge(70))
+        (True, True, True)
+        >>> check(rng.integers(1, 10, 300), rng.integers(-9, 10, 300))
+        True
+        >>> near_bound = lambda n: rng.integers(2**16, 2**17, n)  # just inside _FFT_EXACT_BOUND
+        >>> check(near_bound(300), near_bound(300)), check(near_bound(250), near_bound(400))
+        (True, True)
+
+        The Numba kernel (not yet used here) must agree as well, when installed:
+        >>> a, b = rng.integers(-10**6, 10**6, 70), rng.integers(-10**6, 10**6, 50)
+        >>> out = np.empty(a.size + b.size - 1, dtype=np.int64)
+        >>> if _mul_kernel is not None:
+        ...     _mul_kernel(a, b, out)
+        ... else:
+        ...     out[:] = np.convolve(a, b)
+        >>> out.tolist() == np.convolve(a, b).tolist()
+        True
         """
-        new_coeffs = [0] * (len(self.coeffs) + len(other.coeffs) - 1)
-
-        for (i, i_co) in enumerate(self.coeffs):
-            for (j, j_co) in enumerate(other.coeffs):
-                new_coeffs[i + j] += i_co * j_co
+        a, b = self.coeffs, other.coeffs
+        if a.ndim != 1 or b.ndim != 1:
+            raise ValueError("Multiplication of batched polynomials is not supported")
+        if a.size == 0 or b.size == 0:
+            return Polynomial([0])
+        work = a.size * b.size
+        if work >= _FFT_THRESHOLD and _fft_is_exact(a, b):
+            return Polynomial(_trim(_fft_convolve(self, other)))
+        if a.dtype == object or b.dtype == object or _product_bound(a, b) > _INT64_MAX:
+            # The result could overflow int64, so fall back to exact Python ints.
+            a, b = a.astype(object), b.astype(object)
+
+        if a.dtype == object and work >= _KARATSUBA_THRESHOLD:
+            out = _karatsuba(a, b)
+        else:
+            out = np.convolve(a, b)
+        return Polynomial(_trim(out))
 
-        return Polynomial(new_coeffs)
+    def __pow__(self, k: int) -> Polynomial:
+        """
+        Return this polynomial raised to the non-negative integer power `k`.
+        >>> p = Polynomial([1, 1])
+        >>> p ** 3
+        Polynomial(1 + 3x + 3x^2 + x^3)
+        >>> q = Polynomial([1, 1], disp_ch='z')
+        >>> q ** 0, q ** 1, q ** 2
+        (Polynomial(1), Polynomial(1 + z), Polynomial(1 + 2z + z^2))
+        """
+        if not isinstance(k, (int, np.integer)):
+            return NotImplemented
+        if self.coeffs.ndim != 1:
+            raise ValueError("Multiplication of batched polynomials is not supported")
+        if k < 0:
+            raise ValueError("Polynomials can only be raised to non-negative powers")
+        if k == 0:
+            return Polynomial(np.ones(self.coeffs.shape[:-1] + (1,), dtype=np.int64),
+                              disp_ch=self.disp_ch)
+
+        # Square-and-multiply. Squaring reuses the base's cached transform for
+        # both operands when the FFT path is taken.
+        result = None
+        base = self
+        while True:
+            if k & 1:
+                result = base if result is None else result * base
+            k >>= 1
+            if not k:
+                break
+            base = base * base
+        # Always return a new polynomial displayed like this one, even for k == 1.
+        return Polynomial(result.coeffs, disp_ch=self.disp_ch)
+
+    def _rfft(self, n: int) -> np.ndarray:
+        """Return the length-`n` real FFT of the coefficients. Since polynomials
+        are immutable, each transform is computed at most once per instance.
+        """
+        spectrum = self._rfft_cache.get(n)
+        if spectrum is None:
+            spectrum = self._rfft_cache[n] = np.fft.rfft(self.coeffs, n)
+        return spectrum
 
     def derivative(self) -> Polynomial:
         """
@@ -108,13 +450,41 @@ class Polynomial:
         >>> p.derivative()
         Polynomial(4 + 10x + 27x^2)
         """
-        if len(self.coeffs) in (0, 1):
-            return Polynomial([0])
+        coeffs = self.coeffs
+        n = coeffs.shape[-1]
+        if n in (0, 1):
+            return Polynomial(np.zeros(coeffs.shape[:-1] + (1,), dtype=np.int64))
         else:
-            new_coeffs = []
-            for (pow, coeff) in enumerate(self.coeffs):
-                new_coeffs.append(pow * coeff)
-            return Polynomial(new_coeffs[1:])
+            if _max_abs(coeffs) * (n - 1) > _INT64_MAX:
+                coeffs = coeffs.astype(object)
+            return Polynomial(coeffs[..., 1:] * np.arange(1, n, dtype=coeffs.dtype))
+
+    @classmethod
+    def stack(cls, polys: List[Polynomial]) -> Polynomial:
+        """Return a batch holding each of `polys` as one row of its coefficients,
+        padded with zeros to a common length.
+
+        >>> p = Polynomial([3, 4, 5, 9])
+        >>> batch = Polynomial.stack([p, p.derivative()])
+        >>> batch
+        Polynomial([3 + 4x + 5x^2 + 9x^3, 4 + 10x + 27x^2])
+        >>> batch(2)
+        array([103, 132])
+        >>> Polynomial.stack([batch, p])
+        Traceback (most recent call last):
+            ...
+        ValueError: Only single polynomials can be stacked, not batches
+        """
+        if not polys:
+            raise ValueError("Cannot stack an empty list of polynomials")
+        if any(p.coeffs.ndim != 1 for p in polys):
+            raise ValueError("Only single polynomials can be stacked, not batches")
+        width = max(p.coeffs.size for p in polys)
+        dtype = np.result_type(*(p.coeffs for p in polys))
+        coeffs = np.zeros((len(polys), width), dtype=dtype)
+        for row, p in zip(coeffs, polys):
+            row[:p.coeffs.size] = p.coeffs
+        return cls(coeffs, disp_ch=polys[0].disp_ch)
 
     @classmethod
     def from_string(cls, s: str) -> Polynomial:
@@ -123,8 +493,7 @@ class Polynomial:
         >>> Polynomial.from_string('3x^3 - 4x + 5')
         Polynomial(3x^3 - 4x + 5)
         """
-        parser = _Parser(s)
-        ast = parser.parse()
+        ast = _parse(_tokenize(s))
 
         # Now we get to have fun turning this ast list into something
         # we can pass to the Polynomial constructor.
@@ -136,26 +505,28 @@ class Polynomial:
                     node_or_op.coefficient *= -1
                 normalized_nodes.append(node_or_op)
             else:
-                last_op_minus = True if node_or_op == '-' else False
+                last_op_minus = node_or_op == '-'
+
+        if not normalized_nodes:
+            raise ParseError("Expected at least one term")
 
-        normalized_nodes = list(
-            sorted(normalized_nodes, key=lambda node: node.exponent))
+        normalized_nodes.sort(key=lambda node: node.exponent)
 
         # Error checking: We want to make sure there are not two nodes with
         # the same exponent (do your arithmetic yourself, user!)
         # and we also want to make sure that all nodes have the same variable
         # name, since neither of these things are checked by the parser.
-        seen_exponents = set()
+        # Since the nodes are sorted by exponent, duplicates are adjacent.
+        prev_exponent = -1
+        var_name = None
         for node in normalized_nodes:
-            if node.exponent not in seen_exponents:
-                seen_exponents.add(node.exponent)
-            else:
+            if node.exponent == prev_exponent:
                 raise ParseError(
                     f"Only one term for each exponent is allowed: this string has at "
                     f" least two terms raised to the power of {node.exponent}")
-
-        var_name = None
-        for node in normalized_nodes:
+            prev_exponent = node.exponent
+            if node.var_name is None:
+                continue
             if var_name is None:
                 var_name = node.var_name
             elif node.var_name != var_name:
@@ -167,16 +538,11 @@ class Polynomial:
         if var_name is None:
             var_name = 'x'
 
-        # Now we have to fill in the gaps
-        largest_exponent = max(
-            normalized_nodes, key=lambda node: node.exponent).exponent
-        coeffs = [0] * (largest_exponent+1)
-
-        # Slow double loop :(
-        for exp in range(largest_exponent+1):
-            for node in normalized_nodes:
-                if node.exponent == exp:
-                    coeffs[exp] = node.coefficient
+        # Now we have to fill in the gaps. The nodes are sorted, so the last
+        # one has the largest exponent.
+        coeffs = [0] * (normalized_nodes[-1].exponent + 1)
+        for node in normalized_nodes:
+            coeffs[node.exponent] = node.coefficient
 
         return cls(coeffs, disp_ch=var_name)
 
@@ -185,17 +551,6 @@ class Polynomial:
 # For reference:
 
 
-class _Token:
-    def __init__(self, type_: _TokenType, value=None):
-        self.type = type_
-        self.value = value
-
-    def __repr__(self):
-        return f'({self.type.name}, {repr(self.value)})'
-
-    __str__ = __repr__
-
-
 class _TokenType(Enum):
     INTEGER = auto()
     OP_PLUS = auto()
@@ -206,83 +561,72 @@ class _TokenType(Enum):
     EOF = auto()
 
 
+# A token is a (type, value, position in the input string) tuple. The value of an
+# INTEGER token is already converted to an int.
+_Token = Tuple[_TokenType, Union[int, str, None], int]
+
+_OPERATORS = {
+    '+': _TokenType.OP_PLUS,
+    '-': _TokenType.OP_MINUS,
+    '*': _TokenType.OP_TIMES,
+    '^': _TokenType.OP_EXPONENT,
+}
+
+
+# Maps each token type that may follow a term to the operator it stands for.
+_ADDOPS = {
+    _TokenType.OP_PLUS: '+',
+    _TokenType.OP_MINUS: '-',
+    _TokenType.EOF: None,
+}
+
+
 class ParseError(Exception):
     pass
 
 
-class _Lexer:
-    """The lexer is responsible for translating a string into a stream of tokens
-    for consumption by the parser.
+def _unexpected(expected: _TokenType, found: _TokenType, pos: int) -> ParseError:
+    return ParseError(
+        f"Expected token of type {expected}, found {found} (beginning at char #{pos})")
+
+
+_TOKEN_RE = re.compile(
+    r'(?P<space>\s+)|(?P<integer>\d+)|(?P<variable>[^\W\d_]+)|(?P<op>[-+*^])|(?P<error>.)',
+    re.DOTALL)
+
+
+def _tokenize(s: str) -> List[_Token]:
+    """Translate a string into a list of tokens for consumption by the parser,
+    in a single pass of `_TOKEN_RE` over the string. The list always ends with
+    an EOF token.
     """
-    current_char: str  # of length 1
-
-    def __init__(self, text):
-        self.text = text
-        self.pos = 0
-
-    def get_next_token(self):
-        if self.pos > len(self.text) - 1:
-            return _Token(_TokenType.EOF)
-        self.current_char = self.text[self.pos]
-
-        if self.current_char.isspace():
-            self.skip_whitespace()
-
-        if self.current_char.isdigit():
-            return self.get_integer()
-        elif self.current_char.isalpha():
-            return self.get_variable()
-        elif self.current_char in ('+', '-', '*', '^'):
-            return self.get_operator()
+    tokens = []
+    append = tokens.append
+    for m in _TOKEN_RE.finditer(s):
+        kind = m.lastgroup
+        if kind == 'space':
+            continue
+        value = m.group()
+        if kind == 'integer':
+            append((_TokenType.INTEGER, int(value), m.start()))
+        elif kind == 'variable':
+            append((_TokenType.VARIABLE, value, m.start()))
+        elif kind == 'op':
+            append((_OPERATORS[value], value, m.start()))
         else:
             raise ParseError(
-                f"Error at char #{self.pos}: unexpected character '{self.current_char}'")
-
-    def skip_whitespace(self):
-        while self.pos < len(self.text) and self.current_char.isspace():
-            self.pos += 1
-            self.current_char = self.text[self.pos] if self.pos < len(
-                self.text) else None
-
-    def get_integer(self):
-        buffer = []
-        while self.pos < len(self.text) and self.current_char.isdigit():
-            buffer.append(self.current_char)
-            self.pos += 1
-            self.current_char = self.text[self.pos] if self.pos < len(
-                self.text) else None
-        return _Token(_TokenType.INTEGER, ''.join(buffer))
-
-    def get_variable(self):
-        buffer = []
-        while self.pos < len(self.text) and self.current_char.isalpha():
-            buffer.append(self.current_char)
-            self.pos += 1
-            self.current_char = self.text[self.pos] if self.pos < len(
-                self.text) else None
-        return _Token(_TokenType.VARIABLE, ''.join(buffer))
-
-    def get_operator(self):
-        op_char = self.current_char
-        self.pos += 1
-        if self.pos < len(self.text):
-            self.current_char = self.text[self.pos]
-
-        if op_char == '+':
-            return _Token(_TokenType.OP_PLUS, '+')
-        elif op_char == '-':
-            return _Token(_TokenType.OP_MINUS, '-')
-        elif op_char == '*':
-            return _Token(_TokenType.OP_TIMES, '*')
-        elif op_char == '^':
-            return _Token(_TokenType.OP_EXPONENT, '^')
+                f"Error at char #{m.start()}: unexpected character '{value}'")
+    append((_TokenType.EOF, None, len(s)))
+    return tokens
 
 
 class _Node:
-    """The `_Node` class is a helper class for the `_Parser`. Every `_Node`
+    """The `_Node` class is a helper class for `_parse`. Every `_Node`
     represents a term of a polynomial.
     """
 
+    __slots__ = ('coefficient', 'var_name', 'exponent')
+
     def __init__(self, coefficient, var_name, exponent):
         self.coefficient = coefficient
         self.var_name = var_name
@@ -292,109 +636,72 @@ class _Node:
         return f'Node({self.coefficient} * {self.var_name} ^ {self.exponent})'
 
 
-class _Parser:
-    """The `_Parser` class is responsible for taking a stream of tokens
-    (provided by its `lexer` member) and turning them into a list of
-    nodes each representing one term of a polynomial.
+def _parse(tokens: List[_Token]) -> List[Union[_Node, str]]:
+    """Turn a list of tokens (produced by `_tokenize`) into a list of nodes
+    each representing one term of a polynomial, interleaved with the '+'/'-'
+    operators separating them.
 
     The grammar which this parser accepts is not recursive; only a subset of
     arithmetic expressions are accepted, for simplicity's sake. (We cannot add,
     subtract, multiply, or exponentiate numbers with numbers, only with variables.)
+    Every term has the form
 
-    There are some hackish things to accomodate the fact that there are implicit
-    exponents and coefficients allowed in the grammar. I am making these explicit in the
-    parser. Of course, one could normalize it elsewhere, but this seems to work decently
-    well, and it's part of the grammar, even if one couldn't write a formal rule for it.
+        INTEGER | [INTEGER ['*']] VARIABLE ['^' INTEGER]
 
-    Also note that once the parse() method has been called, the parser is in an unstable
-    state. One must explicitly call reset() before calling the parse() method again.
+    and terms are separated by '+' or '-', so one token of lookahead always decides
+    what comes next. Implicit coefficients and exponents are made explicit here.
     """
-
-    def __init__(self, s: str):
-        self.lexer = _Lexer(s)
-        self.advance()
-
-    def reset(self):
-        """Useful for debugging"""
-        self.lexer = _Lexer(self.lexer.text)
-        self.advance()
-
-    def advance(self):
-        self.current_token = self.lexer.get_next_token()
-
-    def eat(self, type_: _TokenType, optional: bool = False):
-        """Skip a token, checking that it is of the proper type.
-        The `optional` flag is provided so that we can allow for the optional
-        presence of the multiplication operator at certain points in the grammar.
-        """
-        if self.current_token.type != type_:
-            if optional:
-                return
-            raise ParseError(
-                f"Expected token of type {type_}, found {self.current_token.type} (beginning at char #{self.lexer.pos})")
-        self.advance()
-
-    def parse(self) -> List[_Node]:
-        """Main parsing method."""
-        result = []
-        while self.current_token.type != _TokenType.EOF:
-            node = self.parse_node()
-            op = self.parse_addop()
-            result.append(node)
-            if op is not None:
-                result.append(op)
-        return result
-
-    def parse_node(self) -> _Node:
-        assert self.current_token.type in (
-            _TokenType.INTEGER, _TokenType.VARIABLE)
-
-        coefficient: int
-        var_name: str
-        exponent: int
-
-        if self.current_token.type == _TokenType.INTEGER:
-            coefficient = int(self.current_token.value)
-        elif self.current_token.type == _TokenType.VARIABLE:
-            coefficient = 1
-            var_name = self.current_token.value
-
-        self.advance()
-        self.eat(_TokenType.OP_TIMES, optional=True)
-
-        token = self.current_token
-        if token.type == _TokenType.VARIABLE:
-            self.advance()
-            var_name = token.value
-        else:
-            if 'var_name' not in locals():  # hackish, but effective
-                var_name = None
-
-        token = self.current_token
-        if token.type == _TokenType.OP_EXPONENT:
-            self.advance()
-            exp_token = self.current_token
-            self.eat(_TokenType.INTEGER)
-            exponent = int(exp_token.value)
-        else:
-            # We know, if var_name has been set to something other than `None`, and we
-            # have no explicit exponent, that this node has an implicit exponent of 1.
-            # This seems somewhat inelegant, but var_name's being set is exactly
-            # equivalent to the informmation we need to make the choice about exponent
-            exponent = 0 if var_name is None else 1
-
-        return _Node(coefficient, var_name, exponent)
-
-    def parse_addop(self):
-        token_type = self.current_token.type
-        if token_type == _TokenType.OP_PLUS:
-            ret = '+'
-        elif token_type == _TokenType.OP_MINUS:
-            ret = '-'
-        elif token_type == _TokenType.EOF:
-            ret = None
-        self.advance()
-        return ret
+    INTEGER = _TokenType.INTEGER
+    VARIABLE = _TokenType.VARIABLE
+    OP_TIMES = _TokenType.OP_TIMES
+    OP_EXPONENT = _TokenType.OP_EXPONENT
+    EOF = _TokenType.EOF
+    addops = _ADDOPS
+
+    result = []
+    i = 0
+    type_, value, pos = tokens[0]
+    while type_ is not EOF:
+        coefficient = 1
+        var_name = None
+        exponent = 0
+
+        if type_ is INTEGER:
+            coefficient = value
+            i += 1
+            type_, value, pos = tokens[i]
+            if type_ is OP_TIMES:
+                i += 1
+                type_, value, pos = tokens[i]
+                if type_ is not VARIABLE:
+                    raise _unexpected(VARIABLE, type_, pos)
+        elif type_ is not VARIABLE:
+            raise _unexpected(INTEGER, type_, pos)
+
+        if type_ is VARIABLE:
+            var_name = value
+            exponent = 1
+            i += 1
+            type_, value, pos = tokens[i]
+            if type_ is OP_EXPONENT:
+                i += 1
+                type_, value, pos = tokens[i]
+                if type_ is not INTEGER:
+                    raise _unexpected(INTEGER, type_, pos)
+                exponent = value
+                i += 1
+                type_, value, pos = tokens[i]
+
+        result.append(_Node(coefficient, var_name, exponent))
+
+        if type_ not in addops:
+            raise _unexpected(_TokenType.OP_PLUS, type_, pos)
+        op = addops[type_]
+        if op is not None:
+            result.append(op)
+            i += 1
+            type_, value, pos = tokens[i]
+    return result
 
 
 if __name__ == '__main__':